@@ -3,8 +3,10 @@
 """cpuinfo plugin for sysmon"""
 
 import os
+import re
 import sys
 import glob
+import atexit
 import ctypes
 import platform
 
@@ -23,16 +25,20 @@ logger = setup_logger(__name__)
 logger.debug("[init] initializing")
 
 try:
-    core_file = en_open("/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq")
+    core_fd = os.open(
+        "/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq", os.O_RDONLY
+    )
+    core_buffer = bytearray(16)
     logger.debug("[open] core_file")
 
 except FileNotFoundError:
-    core_file = None
+    core_fd = None
 
-proc_stat_file = en_open("/proc/stat")
+proc_stat_fd = os.open("/proc/stat", os.O_RDONLY)
+proc_stat_buffer = bytearray(512)  # only the first (cpu) line is needed
 logger.debug("[open] /proc/stat")
 
-hwmon_dirs_out = glob.glob("/sys/class/hwmon/*")
+CPU_OLD_DATA_SEED = "cpu.758102.17.259220.2395399.122421.3.1284"
 
 data_dict = {
     "cpu_freq": "Unknown",
@@ -45,26 +51,72 @@ data_dict = {
     "cpu_cache_type": 0,
 }
 
+HEADER = f"  ——— /proc/cpuinfo {'—' * 47}\n"
+
+CPUINFO_RE = re.compile(
+    rb"^(cache size|cpu MHz|model name|Hardware)[ \t]*:[ \t]*(.+)$", re.MULTILINE
+)
+
+CPU_MODEL_JUNK = (
+    "(R)",
+    "(TM)",
+    "(tm)",
+    "Processor",
+    "processor",
+    '"AuthenticAMD"',
+    "Chip Revision",
+    "Technologies, Inc",
+    "CPU",
+    "with Radeon HD Graphics",
+    "with Radeon Graphics",
+)
+
+CPU_MODEL_JUNK_RE = re.compile("|".join(map(re.escape, CPU_MODEL_JUNK)))
+
+
+def set_cache_size(value):
+    """/proc/cpuinfo 'cache size', used only if the cache lib didnt find it"""
+
+    if data_dict["cpu_cache"] == "Unknown":
+        logger.debug("[cache] fallback to /proc/cpuinfo cache")
+
+        data_dict["cpu_cache"] = convert_bytes(
+            to_bytes(int(value.lower().replace("kb", "")))
+        )
+
+
+def set_cpu_freq(value):
+    """/proc/cpuinfo 'cpu MHz'"""
+
+    data_dict["cpu_freq"] = round(float(value), 2)
+
+
+def set_cpu_model(value):
+    """/proc/cpuinfo 'model name'"""
+
+    model = clean_cpu_model(value)
+    data_dict["cpu_model"] = model if len(model) < 25 else model[:22] + "..."
+
+
+def set_cpu_hardware(value):
+    """/proc/cpuinfo 'Hardware', arm only"""
+
+    if data_dict["cpu_arch"] in ("aarch64", "armv7l"):
+        data_dict["cpu_model"] = clean_cpu_model(value)
+
+
+CPUINFO_FIELDS = {
+    b"cache size": set_cache_size,
+    b"cpu MHz": set_cpu_freq,
+    b"model name": set_cpu_model,
+    b"Hardware": set_cpu_hardware,
+}
+
 
 def clean_cpu_model(model):
     """cleaning cpu model"""
 
-    replace_stuff = [
-        "(R)",
-        "(TM)",
-        "(tm)",
-        "Processor",
-        "processor",
-        '"AuthenticAMD"',
-        "Chip Revision",
-        "Technologies, Inc",
-        "CPU",
-        "with Radeon HD Graphics",
-        "with Radeon Graphics",
-    ]
-
-    for text in replace_stuff:
-        model = model.replace(text, "")
+    model = CPU_MODEL_JUNK_RE.sub("", model)
 
     return " ".join(model.split()).split("@", maxsplit=1)[0].rstrip(" ")
 
@@ -81,8 +133,6 @@ def get_info():
 
     try:
         buffer = ctypes.create_string_buffer(64)
-        buffer_cores_phys = ctypes.c_uint
-        buffer_cores_log = ctypes.c_uint
 
         # prioritize in-tree shared object
         if os.path.exists("util/sysmon_cpu_utils.so"):
@@ -93,6 +143,12 @@ def get_info():
             logger.debug("[cache lib] using global lib")
             cpu_utils = ctypes.CDLL("sysmon_cpu_utils.so")
 
+        # declare the prototypes, so ctypes doesnt have to guess them per call
+        cpu_utils.get_cores.argtypes = (ctypes.c_int,)
+        cpu_utils.get_cores.restype = ctypes.c_uint
+        cpu_utils.get_cache_size.argtypes = (ctypes.c_char_p,)
+        cpu_utils.get_cache_size.restype = None
+
         buffer_cores_phys = cpu_utils.get_cores(1)
         buffer_cores_log = cpu_utils.get_cores(0)
 
@@ -126,43 +182,30 @@ def get_info():
         pass
 
     try:
-        with en_open("/proc/cpuinfo") as cpuinfo_file:
-            for line in cpuinfo_file:
-                if data_dict["cpu_cache"] == "Unknown":
-                    logger.debug("[cache] fallback to /proc/cpuinfo cache")
-
-                    if line.startswith("cache size"):
-                        data_dict["cpu_cache"] = convert_bytes(
-                            to_bytes(
-                                int(
-                                    line.split(":")[1].strip().lower().replace("kb", "")
-                                )
-                            )
-                        )
-
-                if line.startswith("cpu MHz"):
-                    data_dict["cpu_freq"] = round(float(line.split(":")[1].strip()), 2)
-
-                if line.startswith("model name"):
-                    model = clean_cpu_model(line.split(":")[1].strip())
-                    data_dict["cpu_model"] = (
-                        model if len(model) < 25 else model[:22] + "..."
-                    )
-
-                if line.startswith("Hardware") and data_dict["cpu_arch"] in (
-                    "aarch64",
-                    "armv7l",
-                ):
-                    data_dict["cpu_model"] = clean_cpu_model(line.split(":")[1].strip())
-
-            # why using getconf and os.sysconf, instead of os.sysconf only?
-            # because os.sysconf LEVEL2_CACHE_SIZE wont return anything on my system
-            # there are better ways to handle this yeah, but for now, it is what it is
-
-            if data_dict["cpu_cores_logical"] == 0:
-                data_dict["cpu_cores_logical"] = os.sysconf(
-                    os.sysconf_names["SC_NPROCESSORS_CONF"]
-                )
+        with open("/proc/cpuinfo", "rb") as cpuinfo_file:
+            cpuinfo_data = cpuinfo_file.read()
+
+        # every logical cpu repeats the same block, so stop once the first
+        # one gave us everything. arm keeps 'Hardware' at the very end
+        needed = {b"cache size", b"cpu MHz", b"model name"}
+
+        for match in CPUINFO_RE.finditer(cpuinfo_data):
+            key, value = match.groups()
+            CPUINFO_FIELDS[key](value.decode().strip())
+
+            needed.discard(key)
+
+            if not needed and data_dict["cpu_arch"] not in ("aarch64", "armv7l"):
+                break
+
+        # why using getconf and os.sysconf, instead of os.sysconf only?
+        # because os.sysconf LEVEL2_CACHE_SIZE wont return anything on my system
+        # there are better ways to handle this yeah, but for now, it is what it is
+
+        if data_dict["cpu_cores_logical"] == 0:
+            data_dict["cpu_cores_logical"] = os.sysconf(
+                os.sysconf_names["SC_NPROCESSORS_CONF"]
+            )
 
     except FileNotFoundError:
         sys.exit("Couldnt find /proc/stat file")
@@ -176,50 +219,71 @@ def get_info():
 def cpu_freq():
     """get cpu frequency"""
 
-    if core_file:
-        core_file.seek(0)
-        logger.debug("[seek] core_file")
+    if core_fd is not None:
+        size = os.preadv(core_fd, [core_buffer], 0)
+        logger.debug("[pread] core_file")
 
-        return round(int(core_file.read().strip()) / 1000, 2)
+        return round(int(core_buffer[:size]) / 1000, 2)
 
     return data_dict["cpu_freq"]
 
 
+def load_cpu_old_data():
+    """
+    the previous /proc/stat sample is kept in memory while sysmon runs,
+    the save file is only read here and written back on exit
+    """
+
+    try:
+        with en_open(SAVE_DIR + "/cpu_old_data") as old_stats:
+            old_data = [int(num) for num in old_stats.readline().split(".")[1:]]
+
+        # cpu_usage() needs at least the first 7 fields
+        if len(old_data) >= 7:
+            return old_data
+
+    except (OSError, ValueError):
+        pass
+
+    return [int(num) for num in CPU_OLD_DATA_SEED.split(".")[1:]]
+
+
+def save_cpu_old_data():
+    """write the last /proc/stat sample to the save file"""
+
+    try:
+        with en_open(SAVE_DIR + "/cpu_old_data", "w") as update_data:
+            update_data.write("cpu." + ".".join(map(str, cpu_old_data)))
+
+    except OSError as exc:
+        logger.debug(f"[save] failed to write cpu_old_data, {exc}")
+
+
 def cpu_usage():
     """/proc/stat - cpu usage of the system"""
 
     try:
-        if not os.path.exists(SAVE_DIR + "/cpu_old_data"):
-            with en_open(SAVE_DIR + "/cpu_old_data", "a") as temp_file:
-                temp_file.write("cpu.758102.17.259220.2395399.122421.3.1284")
-
-        with en_open(SAVE_DIR + "/cpu_old_data") as old_stats:
-            old_stats = old_stats.readline().split(".")
-            previous_data = (
-                int(old_stats[1])
-                + int(old_stats[2])
-                + int(old_stats[3])
-                + int(old_stats[6])
-                + int(old_stats[7])
-            )
+        previous_data = (
+            cpu_old_data[0]
+            + cpu_old_data[1]
+            + cpu_old_data[2]
+            + cpu_old_data[5]
+            + cpu_old_data[6]
+        )
 
-        proc_stat_file.seek(0)
-        logger.debug("[seek] /proc/stat")
+        size = os.preadv(proc_stat_fd, [proc_stat_buffer], 0)
+        logger.debug("[pread] /proc/stat")
 
-        new_stats = proc_stat_file.readline().replace("cpu ", "cpu").strip().split(" ")
+        new_stats = proc_stat_buffer[:size].split(b"\n", 1)[0].split()
+        new_ints = list(map(int, new_stats[1:]))
 
         current_data = (
-            int(new_stats[1])
-            + int(new_stats[2])
-            + int(new_stats[3])
-            + int(new_stats[6])
-            + int(new_stats[7])
+            new_ints[0] + new_ints[1] + new_ints[2] + new_ints[5] + new_ints[6]
         )
 
-        total = sum(map(int, old_stats[1:])) - sum(map(int, new_stats[1:]))
+        total = sum(cpu_old_data) - sum(new_ints)
 
-        with en_open(SAVE_DIR + "/cpu_old_data", "w") as update_data:
-            update_data.write(".".join(new_stats))
+        cpu_old_data[:] = new_ints
 
         try:
             return str(abs(round(100 * ((previous_data - current_data) / total), 1))) + "%"
@@ -239,20 +303,37 @@ def cpu_usage():
 
 
 # there has to be a different, better way to do this.
-def get_cpu_temp_file(hwmon_dirs):
+def get_cpu_temp_file():
     """getting the cpu temperature from /sys/class/hwmon"""
 
-    allowed_types = ("coretemp", "k10temp", "acpitz", "cpu_1_0_usr")
+    allowed_types = (b"coretemp", b"k10temp", b"acpitz", b"cpu_1_0_usr")
     temperature_file = None
 
-    for temp_dir in hwmon_dirs:
-        with en_open(temp_dir + "/name") as temp_type:
-            sensor_type = temp_type.read().strip()
+    # a missing or restricted /sys (containers, sandboxes) just means no temp
+    try:
+        hwmon_dirs = os.scandir("/sys/class/hwmon")
+
+    except OSError:
+        return None
+
+    with hwmon_dirs:
+        for temp_dir in hwmon_dirs:
+            try:
+                name_fd = os.open(temp_dir.path + "/name", os.O_RDONLY)
+
+                try:
+                    sensor_type = os.read(name_fd, 32).strip()
 
-            logger.debug(f"[sensors] {temp_dir}: {sensor_type}")
+                finally:
+                    os.close(name_fd)
+
+            except OSError:
+                continue
+
+            logger.debug(f"[sensors] {temp_dir.path}: {sensor_type.decode()}")
 
             if sensor_type in allowed_types:
-                temperature_file = glob.glob(f"{temp_dir}/temp*_input")[-1]
+                temperature_file = glob.glob(f"{temp_dir.path}/temp*_input")[-1]
                 logger.debug(f"[temp file] cpu temp sensor: {temperature_file}")
                 break
 
@@ -261,10 +342,14 @@ def get_cpu_temp_file(hwmon_dirs):
 
 get_info()
 
-cpu_temp_file = get_cpu_temp_file(hwmon_dirs_out)
+cpu_old_data = load_cpu_old_data()
+atexit.register(save_cpu_old_data)
+
+cpu_temp_file = get_cpu_temp_file()
 
 if cpu_temp_file:
-    temperature_data = en_open(get_cpu_temp_file(hwmon_dirs_out))
+    temperature_fd = os.open(cpu_temp_file, os.O_RDONLY)
+    temperature_buffer = bytearray(16)
     logger.debug("[open] cpu temp sensor")
 
 
@@ -276,10 +361,10 @@ def main():
     cpu_temperature = "!?"
 
     if cpu_temp_file:  # 2 ifs...?
-        temperature_data.seek(0)
-        logger.debug("[seek] cpu temp sensor")
+        size = os.preadv(temperature_fd, [temperature_buffer], 0)
+        logger.debug("[pread] cpu temp sensor")
 
-        cpu_temperature = str(int(temperature_data.read().strip()) // 1000)
+        cpu_temperature = str(int(temperature_buffer[:size]) // 1000)
 
     if cpu_temperature != "!?" and SHOW_TEMPERATURE:
         cpu_temperature += " °C"
@@ -299,7 +384,7 @@ def main():
         cpu_cores_phys = data_dict["cpu_cores_logical"]
 
     output_text = (
-        f"  ——— /proc/cpuinfo {'—' * 47}\n"
+        f"{HEADER}"
         f"   Usage: {cpu_usage_num:>6} {arch_model_temp_line}" + "\n"
         f"   Cores: {cpu_cores_phys}c/{data_dict['cpu_cores_logical']}t | Frequency: {cpu_freq():>7} MHz | Cache: {data_dict['cpu_cache']}"
     )
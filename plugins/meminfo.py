@@ -2,13 +2,13 @@
 
 """meminfo plugin for sysmon"""
 
+import os
+import re
+
 from util.util import (
     convert_bytes,
     to_bytes,
-    clean_output,
-    file_has,
     SHOW_SWAP,
-    en_open,
 )
 from util.logger import setup_logger
 
@@ -17,34 +17,49 @@ logger = setup_logger(__name__)
 logger.debug("[init] initializing")
 
 logger.debug("[open] /proc/meminfo")
-meminfo_file = en_open("/proc/meminfo")
+meminfo_fd = os.open("/proc/meminfo", os.O_RDONLY)
+
+# procfs cant be mmap'd, so the file is pread into the same buffer every tick
+meminfo_buffer = bytearray(8192)
+meminfo_view = memoryview(meminfo_buffer)
+
+HEADER = f"  ——— /proc/meminfo {'—' * 47}\n   RAM: {' ' * 25}\n"
+HEADER_SWAP = f"  ——— /proc/meminfo {'—' * 47}\n     RAM: {' ' * 25}Swap:\n"
+
+# swap fields are only scanned for when they are going to be shown
+MEMINFO_RE = re.compile(
+    rb"^(MemTotal|MemFree|MemAvailable|Cached|Buffers|SReclaimable"
+    + (rb"|SwapTotal|SwapFree|SwapCached" if SHOW_SWAP else b"")
+    + rb"):\s+(\d+)",
+    re.MULTILINE,
+)
 
 
 def main():
     """/proc/meminfo - system memory information"""
 
-    meminfo_file.seek(0)
-    logger.debug("[seek] /proc/meminfo")
+    size = os.preadv(meminfo_fd, [meminfo_buffer], 0)
+    logger.debug("[pread] /proc/meminfo")
 
-    meminfo_data = meminfo_file.readlines()
+    # one scan over the file, picking only the fields used below
+    meminfo_data = {
+        key: to_bytes(int(value))
+        for key, value in MEMINFO_RE.findall(meminfo_view[:size])
+    }
 
-    memory_total = to_bytes(int(clean_output(file_has("MemTotal", meminfo_data))))
-    memory_available = to_bytes(
-        int(clean_output(file_has("MemAvailable", meminfo_data)))
-    )
+    memory_total = meminfo_data[b"MemTotal"]
+    memory_available = meminfo_data[b"MemAvailable"]
 
-    raw_memory_cached = to_bytes(int(clean_output(file_has("Cached", meminfo_data))))
-    sreclaimable_memory = to_bytes(
-        int(clean_output(file_has("SReclaimable", meminfo_data)))
-    )
-    memory_buffers = to_bytes(int(clean_output(file_has("Buffers", meminfo_data))))
+    raw_memory_cached = meminfo_data[b"Cached"]
+    sreclaimable_memory = meminfo_data[b"SReclaimable"]
+    memory_buffers = meminfo_data[b"Buffers"]
 
     memory_cached = raw_memory_cached + memory_buffers + sreclaimable_memory
 
-    memory_free = to_bytes(int(clean_output(file_has("MemFree", meminfo_data))))
-    memory_used = round(memory_total - memory_available)
+    memory_free = meminfo_data[b"MemFree"]
+    memory_used = memory_total - memory_available
 
-    memory_actual_used = round(
+    memory_actual_used = (
         memory_total
         - memory_free
         - memory_buffers
@@ -52,32 +67,29 @@ def main():
         - sreclaimable_memory
     )
 
-    memory_used_percent = round((int(memory_used) / int(memory_total)) * 100, 1)
+    # divide once, multiply for every percentage
+    memory_percent = 100 / memory_total
 
-    memory_actual_used_percent = round(
-        (int(memory_actual_used) / int(memory_total)) * 100, 1
-    )
+    memory_used_percent = round(memory_used * memory_percent, 1)
+    memory_actual_used_percent = round(memory_actual_used * memory_percent, 1)
 
     memory_available_percent = round(100 - memory_used_percent, 1)
-    memory_free_percent = round((int(memory_free) / int(memory_total)) * 100, 1)
+    memory_free_percent = round(memory_free * memory_percent, 1)
 
     memory_used_format = f"{convert_bytes(memory_used)} ({memory_used_percent}%)"
     memory_avail_format = (
         f"{convert_bytes(memory_available)} " f"({memory_available_percent}%)"
     )
 
-    if (
-        to_bytes(int(clean_output(file_has("SwapTotal", meminfo_data)))) != 0
-        and SHOW_SWAP is not False
-    ):
+    if SHOW_SWAP and meminfo_data[b"SwapTotal"] != 0:
         logger.debug("[memory] swap stats")
 
-        swap_total = to_bytes(int(clean_output(file_has("SwapTotal", meminfo_data))))
-        swap_available = to_bytes(int(clean_output(file_has("SwapFree", meminfo_data))))
-        swap_cached = to_bytes(int(clean_output(file_has("SwapCached", meminfo_data))))
+        swap_total = meminfo_data[b"SwapTotal"]
+        swap_available = meminfo_data[b"SwapFree"]
+        swap_cached = meminfo_data[b"SwapCached"]
 
-        swap_used = round(swap_total - swap_available)
-        swap_used_percent = round((int(swap_used) / int(swap_total)) * 100, 1)
+        swap_used = swap_total - swap_available
+        swap_used_percent = round(swap_used * 100 / swap_total, 1)
         swap_available_percent = round(100 - swap_used_percent, 1)
 
         total_memory = memory_total + swap_total
@@ -93,8 +105,7 @@ def main():
         logger.debug("[data] print out")
 
         return (
-            f"  ——— /proc/meminfo {'—' * 47}\n"
-            f"     RAM: {' ' * 25}Swap:\n"
+            f"{HEADER_SWAP}"
             f"         Total: {convert_bytes(memory_total)}"
             + f"{' ':<16}Total: {convert_bytes(swap_total)}\n"
             f"          Used: {memory_used_format}"
@@ -115,8 +126,7 @@ def main():
     logger.debug("[data] print out")
 
     return (
-        f"  ——— /proc/meminfo {'—' * 47}\n"
-        f"   RAM: {' ' * 25}\n"
+        f"{HEADER}"
         f"        Total: {convert_bytes(memory_total)}"
         + f"{' ':<17}Cached: {convert_bytes(memory_cached)}\n"
         f"         Used: {convert_bytes(memory_used)} ({memory_used_percent}%)"